@@ -10,8 +10,11 @@ __version__ = """0.3.0"""
 
 
 import argparse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from math import atan, ceil, sin, cos, degrees, pi, copysign
+from math import atan2, sin, cos, hypot
 from datetime import datetime
 from abc import ABC, abstractmethod
 from types import SimpleNamespace
@@ -25,21 +28,137 @@ if not hasattr(Image, "Resampling"):
     Image.Resampling = SimpleNamespace()
     Image.Resampling.BICUBIC = Image.BICUBIC
     Image.Resampling.NEAREST = Image.NEAREST
-
-
+    Image.Resampling.BILINEAR = Image.BILINEAR
+    Image.Resampling.BOX = Image.BOX
+if not hasattr(Image, "Transform"):
+    Image.Transform = SimpleNamespace()
+    Image.Transform.AFFINE = Image.AFFINE
+if not hasattr(Image, "Transpose"):
+    Image.Transpose = SimpleNamespace()
+    Image.Transpose.ROTATE_90 = Image.ROTATE_90
+    Image.Transpose.ROTATE_180 = Image.ROTATE_180
+    Image.Transpose.ROTATE_270 = Image.ROTATE_270
+
+
+@lru_cache(maxsize=32)
 def rescaled_image_size(canvas_width, canvas_height, image_width, image_height):
     """Compute image size to embed into canvas."""
-    ar = image_width / image_height
-    if ar >= canvas_width / canvas_height:
-        # image is wider than window => cut away height
-        iw, ih = canvas_width, canvas_width / ar
-    else:
-        # image is narrower than window => cut away width
-        iw, ih = canvas_height * ar, canvas_height
-    return int(iw), int(ih)
+    # s / (image_width * image_height) is the smaller one of the scales
+    # canvas_width / image_width and canvas_height / image_height, i.e. either
+    # width or height is cut away; integer arithmetic avoids rounding errors
+    s = min(canvas_width * image_height, canvas_height * image_width)
+    return int(s // image_height), int(s // image_width)
+
+
+def resize_for_preview(image, size):
+    """Resize image to size for display using bilinear filtering. Strong
+    downscaling first reduces image by an integer factor (cheap box filter),
+    so only the remaining factor of at most 2 is filtered bilinearly."""
+    return image.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+
+
+@lru_cache(maxsize=32)
+def canvas_to_image_transform(canvas_width, canvas_height, image_width, image_height):
+    """Compute offsets and scales (ix, iy, sx, sy) such that canvas coordinates
+    (x, y) correspond to image coordinates ((x - ix) * sx, (y - iy) * sy) for an
+    image embedded into the canvas (see rescaled_image_size)."""
+    iw, ih = rescaled_image_size(canvas_width, canvas_height, image_width, image_height)
+    ix, iy = (canvas_width - iw) // 2, (canvas_height - ih) // 2
+    return ix, iy, image_width / iw, image_height / ih
+
+
+def canvas_to_image(x, y, canvas_width, canvas_height, image_width, image_height):
+    """Transform canvas coordinates (x, y) to image coordinates for an image
+    embedded into the canvas (see rescaled_image_size)."""
+    ix, iy, sx, sy = canvas_to_image_transform(
+        canvas_width, canvas_height, image_width, image_height
+    )
+    return (x - ix) * sx, (y - iy) * sy
+
+
+def project_to_circle(x, y, center_x, center_y, radius):
+    """Project point (x, y) onto circle of given radius around center."""
+    dx, dy = x - center_x, y - center_y
+    alpha = radius / hypot(dx, dy)
+    return center_x + alpha * dx, center_y + alpha * dy
+
+
+def selection_corners(x, y, center_x, center_y, radius):
+    """Compute corners (x1, y1, x2, y2) of a selected rectangle inscribed in circle,
+    given by projecting mouse position (x, y) onto the circle and its opposite;
+    None if the mouse is at the circle center, where the projection is undefined."""
+    # plain float arithmetic, avoiding intermediate Point objects;
+    # projection onto circle is inlined (see project_to_circle)
+    dx, dy = x - center_x, y - center_y
+    d = hypot(dx, dy)
+    if d == 0:
+        return None
+    x1, y1 = center_x + radius / d * dx, center_y + radius / d * dy
+    return x1, y1, 2 * center_x - x1, 2 * center_y - y1
+
+
+def rotation_angle(x1, y1, x2, y2):
+    """Compute rotation angle of vector from (x1, y1) to (x2, y2)
+    w.r.t. horizontal line (with y increasing downwards)."""
+    return -atan2(y2 - y1, x2 - x1)
+
+
+def circle_bounding_box_from_diameter(x1, y1, x2, y2):
+    """Compute bounding box (x_min, y_min, x_max, y_max) for a circle
+    from diametric points (x1, y1) and (x2, y2)."""
+    center_x, center_y = (x1 + x2) / 2, (y1 + y2) / 2
+    radius = hypot(x2 - x1, y2 - y1) / 2
+    return center_x - radius, center_y - radius, center_x + radius, center_y + radius
+
+
+def convert_for_display(image):
+    """Convert image to a mode Tk photo images take without further conversion,
+    i.e. "L", "RGB" or "RGBA"; image is returned unchanged if possible."""
+    if image.mode in ("L", "RGB", "RGBA"):
+        return image
+    has_alpha = "transparency" in image.info or image.mode in ("LA", "La", "PA", "RGBa")
+    return image.convert("RGBA" if has_alpha else "RGB")
+
+
+def open_image_with_preview(filename, preview_size):
+    """Open image and load a preview of it, at least preview_size if possible.
+    JPEG can be decoded at reduced scale (1/2, 1/4, 1/8), returning the (not yet
+    loaded) image and its reduced preview. Otherwise the image is loaded at full
+    resolution and returned as its own preview, i.e. it is only decoded once."""
+    preview_image = Image.open(filename)
+    full_size = preview_image.size
+    drafted = preview_image.draft(preview_image.mode, preview_size)
+    preview_image.load()
+    if drafted is None or preview_image.size == full_size:
+        return preview_image, preview_image
+    return Image.open(filename), preview_image
+
+
+def image_pyramid(image, min_size=512):
+    """Compute list of successively halved copies of image, starting with image
+    itself and ending with the first copy whose shorter side is <= min_size."""
+    pyramid = [image]
+    while min(image.width, image.height) > min_size:
+        # box filter averages exactly the 2x2 source pixels of each target pixel
+        image = image.resize(
+            (image.width // 2, image.height // 2), Image.Resampling.BOX
+        )
+        pyramid.append(image)
+    return pyramid
+
+
+def pyramid_level(pyramid, size):
+    """Select smallest image from pyramid which is at least as large as size."""
+    iw, ih = size
+    for image in reversed(pyramid):
+        if image.width >= iw and image.height >= ih:
+            return image
+    return pyramid[0]
 
 
 class Point(ABC):
+    __slots__ = ("x", "y")
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
@@ -49,8 +168,7 @@ class Point(ABC):
 
     def __iter__(self):
         """Implements iteration to support destructuring assignments for Points."""
-        yield self.x
-        yield self.y
+        return iter((self.x, self.y))
 
     def __getitem__(self, index):
         if index == 0:
@@ -60,21 +178,26 @@ class Point(ABC):
         else:
             raise IndexError(f"Points can only be indexed by 0 or 1, got {index}")
 
-    def assert_same_type(self, other):
-        assert type(self) == type(other), (
+    def _type_mismatch_message(self, other):
+        return (
             f"Cannot perform operation as self is of type "
             f"{type(self).__name__} while other is of type {type(other).__name__}"
         )
 
+    def assert_same_type(self, other):
+        assert type(self) is type(other), self._type_mismatch_message(other)
+
     def __eq__(self, other):
-        return type(self) == type(other) and self.x == other.x and self.y == other.y
+        return type(self) is type(other) and self.x == other.x and self.y == other.y
 
+    # type checks are inlined below (instead of calling assert_same_type) so that
+    # they vanish completely with python -O
     def __add__(self, other):
-        self.assert_same_type(other)
+        assert type(self) is type(other), self._type_mismatch_message(other)
         return type(self)(self.x + other.x, self.y + other.y)
 
     def __sub__(self, other):
-        self.assert_same_type(other)
+        assert type(self) is type(other), self._type_mismatch_message(other)
         return type(self)(self.x - other.x, self.y - other.y)
 
     def __mul__(self, factor):
@@ -87,7 +210,12 @@ class Point(ABC):
         return -1 * self
 
     def __abs__(self):
-        return (self.x**2 + self.y**2) ** 0.5
+        return hypot(self.x, self.y)
+
+    def distance_to(self, other):
+        """Euclidean distance between self and other."""
+        assert type(self) is type(other), self._type_mismatch_message(other)
+        return hypot(other.x - self.x, other.y - self.y)
 
     def middle_between(self, other):
         """Middle point between self and other."""
@@ -99,22 +227,25 @@ class Point(ABC):
 
     def project_to_circle_around(self, center, radius):
         """Project self onto circle of given radius around center."""
-        alpha = radius / abs(self - center)
-        return center + alpha * (self - center)
+        self.assert_same_type(center)
+        return type(self)(
+            *project_to_circle(self.x, self.y, center.x, center.y, radius)
+        )
 
     def rotation_angle(self, other):
         """Compute rotation angle of difference vector around self w.r.t. horizontal line.
         This is the angle *by which the vector is rotated*. To correct for it, you
         have to rotate *minus* this angle."""
-        dx, dy = other - self
-        # minus for correcting that y increases downwards
-        return -(atan(dy / dx) if dx != 0 else copysign(0.5 * pi, dy))
+        self.assert_same_type(other)
+        return rotation_angle(self.x, self.y, other.x, other.y)
 
     def circle_bounding_box_from_diameter(self, other):
         """Compute bounding box for a circle from diametric points self and other."""
-        center = self.middle_between(other)
-        radius = abs(center - self)
-        return center - type(self)(radius, radius), center + type(self)(radius, radius)
+        self.assert_same_type(other)
+        x_min, y_min, x_max, y_max = circle_bounding_box_from_diameter(
+            self.x, self.y, other.x, other.y
+        )
+        return type(self)(x_min, y_min), type(self)(x_max, y_max)
 
     @abstractmethod
     def to_image_coordinates(
@@ -124,6 +255,8 @@ class Point(ABC):
 
 
 class ImagePoint(Point):
+    __slots__ = ()
+
     def to_image_coordinates(
         self, canvas_width, canvas_height, image_width, image_height
     ):
@@ -131,19 +264,21 @@ class ImagePoint(Point):
 
 
 class CanvasPoint(Point):
+    __slots__ = ()
+
     def to_image_coordinates(
         self, canvas_width, canvas_height, image_width, image_height
     ):
-        iw, ih = rescaled_image_size(
-            canvas_width, canvas_height, image_width, image_height
-        )
-        ix, iy = (canvas_width - iw) // 2, (canvas_height - ih) // 2
         return ImagePoint(
-            (self.x - ix) / iw * image_width, (self.y - iy) / ih * image_height
+            *canvas_to_image(
+                self.x, self.y, canvas_width, canvas_height, image_width, image_height
+            )
         )
 
 
 class Rectangle:
+    __slots__ = ("left_upper", "right_upper", "right_lower", "left_lower")
+
     def __init__(self, left_upper, right_upper, right_lower, left_lower):
         left_upper.assert_same_type(right_upper)
         left_upper.assert_same_type(right_lower)
@@ -161,27 +296,27 @@ class Rectangle:
 
     def __iter__(self):
         """Implements iteration to support destructuring assignments for Points."""
-        yield self.left_upper
-        yield self.right_upper
-        yield self.right_lower
-        yield self.left_lower
+        return iter(
+            (self.left_upper, self.right_upper, self.right_lower, self.left_lower)
+        )
 
     def flatten(self):
-        for point in self:
-            for coordinate in point:
-                yield coordinate
+        """Flat tuple of all corner coordinates, e.g. for Tk polygons."""
+        lu, ru, rl, ll = self
+        return (lu.x, lu.y, ru.x, ru.y, rl.x, rl.y, ll.x, ll.y)
 
     def containing_rectangle(self):
         """Compute smallest rectangle (with sides parallel to the axes)
         containing self (a possibly rotated rectangle)."""
-        xs = [point.x for point in self]
-        ys = [point.y for point in self]
-        PointType = type(self.left_upper)
+        lu, ru, rl, ll = self
+        min_x, max_x = min(lu.x, ru.x, rl.x, ll.x), max(lu.x, ru.x, rl.x, ll.x)
+        min_y, max_y = min(lu.y, ru.y, rl.y, ll.y), max(lu.y, ru.y, rl.y, ll.y)
+        PointType = type(lu)
         return Rectangle(
-            PointType(min(xs), min(ys)),
-            PointType(max(xs), min(ys)),
-            PointType(max(xs), max(ys)),
-            PointType(min(xs), max(ys)),
+            PointType(min_x, min_y),
+            PointType(max_x, min_y),
+            PointType(max_x, max_y),
+            PointType(min_x, max_y),
         )
 
     def rotation_angle(self):
@@ -199,54 +334,144 @@ class Rectangle:
         self, canvas_width, canvas_height, image_width, image_height
     ):
         """Transform self in canvas coordinates to rectangle in image coordinates."""
+        if type(self.left_upper) is ImagePoint:
+            return self
+        # all corners share the same transform, hence compute it only once
+        ix, iy, sx, sy = canvas_to_image_transform(
+            canvas_width, canvas_height, image_width, image_height
+        )
         return Rectangle(
-            *[
-                point.to_image_coordinates(
-                    canvas_width, canvas_height, image_width, image_height
-                )
-                for point in self
-            ]
+            *[ImagePoint((point.x - ix) * sx, (point.y - iy) * sy) for point in self]
         )
 
 
+def _rounded_sign(value):
+    """Sign of value, treating values less than half a pixel as zero."""
+    return 0 if abs(value) < 0.5 else (1 if value > 0 else -1)
+
+
+# transposition to apply to a plain crop for rectangles rotated by multiples of 90
+# degrees, keyed by rounded signs of upper and left edge vectors (x, y, x, y);
+# rotation by 180 degrees does not occur as rectangles are kept upright
+_ORTHOGONAL_TRANSPOSITIONS = {
+    (1, 0, 0, 1): None,
+    (0, 1, -1, 0): Image.Transpose.ROTATE_90,
+    (0, -1, 1, 0): Image.Transpose.ROTATE_270,
+}
+
+
+def _upright_corners(rectangle):
+    """Corners left upper, right upper and left lower of rectangle, reordered
+    such that the cropped image is rotated by at most 90 degrees and not mirrored.
+    The upper edge is parallel to the edge from left upper to right upper corner,
+    in the direction pointing right (or as given if vertical)."""
+    lu, ru, rl, ll = rectangle
+    ux, uy = ru.x - lu.x, ru.y - lu.y
+    if ux < 0:
+        ux, uy = -ux, -uy
+    vx, vy = ll.x - lu.x, ll.y - lu.y
+    if ux * vy - uy * vx < 0:
+        # left edge has to point clockwise from upper edge (y increases downwards)
+        vx, vy = -vx, -vy
+    x, y = (lu.x + rl.x - ux - vx) / 2, (lu.y + rl.y - uy - vy) / 2
+    PointType = type(lu)
+    return PointType(x, y), PointType(x + ux, y + uy), PointType(x + vx, y + vy)
+
+
 def crop_rectangle(rectangle, image, canvas_width, canvas_height):
-    """Crop (possibly rotated) rectangle from image."""
-    image_containing_rectangle = rectangle.containing_rectangle().to_image_rectangle(
-        canvas_width,
-        canvas_height,
-        image.width,
-        image.height,
+    """Crop (possibly rotated) rectangle from image.
+    The cropped image is rotated such that the edge from left upper to right upper
+    corner of rectangle becomes horizontal, by at most 90 degrees and without
+    mirroring (see _upright_corners)."""
+    image_rectangle = rectangle.to_image_rectangle(
+        canvas_width, canvas_height, image.width, image.height
     )
-    cont_rect = image.crop(
-        [
-            *image_containing_rectangle.left_upper,
-            *image_containing_rectangle.right_lower,
-        ]
-    ).rotate(
-        -degrees(rectangle.rotation_angle()),
-        expand=True,
+    lu, ru, ll = _upright_corners(image_rectangle)
+    width, height = max(1, round(lu.distance_to(ru))), max(1, round(lu.distance_to(ll)))
+    edge_signs = tuple(
+        _rounded_sign(v) for v in (ru.x - lu.x, ru.y - lu.y, ll.x - lu.x, ll.y - lu.y)
+    )
+    if edge_signs in _ORTHOGONAL_TRANSPOSITIONS:
+        # rotated by a multiple of 90 degrees (up to half a pixel)
+        # => plain crop and lossless transposition without resampling
+        transposition = _ORTHOGONAL_TRANSPOSITIONS[edge_signs]
+        x, y = image_rectangle.containing_rectangle().left_upper
+        x, y = round(x), round(y)
+        if edge_signs[0] == 0:
+            # upper edge is vertical in image
+            width, height = height, width
+        cropped = image.crop((x, y, x + width, y + height))
+        return cropped if transposition is None else cropped.transpose(transposition)
+    # affine map from output pixel coordinates (x, y) to image coordinates
+    # lu + x * (ru - lu) / width + y * (ll - lu) / height in a single resampling pass
+    return image.transform(
+        (width, height),
+        Image.Transform.AFFINE,
+        (
+            (ru.x - lu.x) / width,
+            (ll.x - lu.x) / height,
+            lu.x,
+            (ru.y - lu.y) / width,
+            (ll.y - lu.y) / height,
+            lu.y,
+        ),
         resample=Image.Resampling.BICUBIC,
     )
-    cont_rect_offsets = rectangle.containing_rectangle_offsets()
-    iw, _ = rescaled_image_size(canvas_width, canvas_height, image.width, image.height)
-    ow, oh = tuple(ceil(abs(v) * image.width / iw) for v in cont_rect_offsets)
-    return cont_rect.crop((ow, oh, cont_rect.width - ow, cont_rect.height - oh))
 
 
 class CropCanvas(Canvas):
     """Canvas supporting image crop by mouse drag + click."""
 
     IMAGE_CROPPED_EVENT = "<<image_cropped>>"
+    RESIZE_DELAY_MS = 40
+    PHOTO_CACHE_MAX_SIZE = 4
+    REDRAW_POLL_MS = 10
 
-    def __init__(self, image, *args, **kwargs):
+    def __init__(self, image, *args, preview_image=None, **kwargs):
         super().__init__(*args, **kwargs)
         self.image = image
-        self.circle = None
-        self.rectangle = None
-        self.projected = None
+        # downscaled copies for preview only, cropping uses the original image;
+        # preview_image may be a lower resolution version of image for that purpose
+        # converted once so that photo images need no per-size mode conversion
+        self._pyramid = image_pyramid(
+            convert_for_display(image if preview_image is None else preview_image)
+        )
+        # selection items are created once (hidden) and then only moved around
+        self.circle = self.create_oval(
+            0, 0, 0, 0, state="hidden", fill="", outline="red", width=2
+        )
+        self.rectangle = self.create_polygon(
+            0, 0, 0, 0, 0, 0, 0, 0, state="hidden", fill="", outline="blue", width=2
+        )
+        self.projected = self.create_oval(0, 0, 0, 0, state="hidden", fill="yellow")
+        self._visible_items = set()
+        self._last_motion = None
+        self._motion_position = None
+        self._motion_job = None
+        self._drag_position = None
+        self._drag_job = None
         self.lu = None
         self.rl = None
-        self.selected_rectangle = None
+        # circle center and radius, updated in on_drag and read in mouse moves
+        self._cx = self._cy = self._r = None
+        # corners right upper and left lower of the selected rectangle
+        self._selected_corners = None
+        # canvas size of the displayed image (which selections refer to)
+        # and canvas size requested by the latest redraw
+        self._canvas_size = None
+        self._requested_canvas_size = None
+        self._cached_size = None
+        self._photo_image = None
+        self._photo_cache = OrderedDict()
+        self._image_item = None
+        self._resize_job = None
+        self._resize_size = None
+        # background resizes; results of superseded redraws are discarded
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._redraw_generation = 0
+        self._redraw_job = None
+        self._pending_size = None
+        self._pending_future = None
         self.bind("<Button-1>", self.on_click)
         self.bind("<Button-3>", self.on_right_click)
         self.bind("<Escape>", self.on_right_click)
@@ -254,93 +479,254 @@ class CropCanvas(Canvas):
         self.bind("<Motion>", self.on_mousemove)
         self.bind("<Configure>", self.on_resize)
 
-    def redraw_image(self):
-        self.winfo_toplevel().update_idletasks()
-        w, h = self.winfo_width(), self.winfo_height()
-        iw, ih = rescaled_image_size(w, h, self.image.width, self.image.height)
-        image_resized = self.image.resize((iw, ih), Image.Resampling.NEAREST)
-        # member variable is required for photo image to prevent garbage collection
-        self._photo_image = ImageTk.PhotoImage(image_resized)
-        self.create_image(
-            (w - iw) // 2, (h - ih) // 2, image=self._photo_image, anchor="nw"
-        )
+    def redraw_image(self, w=None, h=None):
+        """Redraw image for canvas size (w, h), which is queried from Tk
+        (after pending geometry updates) if not given."""
+        if w is None or h is None:
+            self.winfo_toplevel().update_idletasks()
+            w, h = self.winfo_width(), self.winfo_height()
+        self._requested_canvas_size = w, h
+        size = rescaled_image_size(w, h, self.image.width, self.image.height)
+        if size == self._cached_size:
+            # size unchanged (e.g. repeated <Configure>) => only re-center
+            self._discard_pending_redraw()
+            self._place_image()
+            return
+        if size == self._pending_size:
+            # resize to this size already in flight
+            return
+        self._discard_pending_redraw()
+        if size in self._photo_cache:
+            self._photo_cache.move_to_end(size)
+            self._commit_photo(self._photo_cache[size], size)
+        elif self._image_item is None:
+            # nothing to show yet => resize synchronously
+            self._commit_photo(self._resize_for_canvas(size), size)
+        else:
+            # keep showing the previous image while resizing in the background;
+            # only the photo image creation has to happen on the Tk thread
+            self._pending_size = size
+            self._pending_future = self._executor.submit(self._resize_for_canvas, size)
+            self._poll_resize(self._pending_future, size, self._redraw_generation)
+
+    def _discard_pending_redraw(self):
+        self._redraw_generation += 1
+        self._pending_size = None
+        if self._pending_future is not None:
+            # no need to resize for a superseded size unless already started
+            self._pending_future.cancel()
+            self._pending_future = None
+        if self._redraw_job:
+            self.after_cancel(self._redraw_job)
+            self._redraw_job = None
+
+    def _resize_for_canvas(self, size):
+        return resize_for_preview(pyramid_level(self._pyramid, size), size)
+
+    def _poll_resize(self, future, size, generation):
+        self._redraw_job = None
+        if generation != self._redraw_generation:
+            # superseded by a newer redraw => discard result
+            return
+        if not future.done():
+            self._redraw_job = self.after(
+                self.REDRAW_POLL_MS, self._poll_resize, future, size, generation
+            )
+            return
+        self._pending_size = self._pending_future = None
+        self._commit_photo(future.result(), size)
+
+    def _commit_photo(self, image, size):
+        """Show image of given size, creating its photo image if necessary."""
+        # cache holds references to photo images to prevent garbage collection;
+        # the image of a canvas never changes, so a cached photo image of the
+        # right size can be reused as is without pasting pixels into it again
+        if not isinstance(image, ImageTk.PhotoImage):
+            image = ImageTk.PhotoImage(image)
+            self._photo_cache[size] = image
+            if len(self._photo_cache) > self.PHOTO_CACHE_MAX_SIZE:
+                self._photo_cache.popitem(last=False)
+        self._photo_image = image
+        self._cached_size = size
+        if self._image_item is not None:
+            self.itemconfig(self._image_item, image=self._photo_image)
+        else:
+            self._image_item = self.create_image(
+                0, 0, image=self._photo_image, anchor="nw"
+            )
+            # keep image below selection items
+            self.tag_lower(self._image_item)
+        self._place_image()
+
+    def _place_image(self):
+        """Center image item on the canvas for the requested canvas size."""
+        self._canvas_size = self._requested_canvas_size
+        (w, h), (iw, ih) = self._canvas_size, self._cached_size
+        self.coords(self._image_item, (w - iw) // 2, (h - ih) // 2)
+
+    def destroy(self):
+        if self._resize_job:
+            self.after_cancel(self._resize_job)
+            self._resize_job = None
+        if self._motion_job:
+            self.after_cancel(self._motion_job)
+            self._motion_job = None
+        if self._drag_job:
+            self.after_cancel(self._drag_job)
+            self._drag_job = None
+        self._discard_pending_redraw()
+        self._executor.shutdown(wait=False)
+        super().destroy()
 
     def on_resize(self, event):
-        self.config(width=event.width, height=event.height)
-        self.redraw_image()
-
-    def _delete_circle_and_rectangle(self):
-        if self.circle:
-            self.delete(self.circle)
-        if self.rectangle:
-            self.delete(self.rectangle)
-        if self.projected:
-            self.delete(self.projected)
-        self.selected_rectangle = None
+        # debounce bursts of <Configure> events into a single redraw after the last
+        self._resize_size = (event.width, event.height)
+        if self._resize_job:
+            self.after_cancel(self._resize_job)
+        self._resize_job = self.after(self.RESIZE_DELAY_MS, self._do_resize)
+
+    def _do_resize(self):
+        self._resize_job = None
+        width, height = self._resize_size
+        self.config(width=width, height=height)
+        # size is known from <Configure>, no need for a synchronous layout pass
+        self.redraw_image(width, height)
+
+    def _show(self, *items):
+        """Show canvas items, skipping Tk calls for items already visible."""
+        for item in items:
+            if item not in self._visible_items:
+                self.itemconfig(item, state="normal")
+                self._visible_items.add(item)
+
+    def _hide(self, *items):
+        """Hide canvas items, skipping Tk calls for items already hidden."""
+        for item in items:
+            if item in self._visible_items:
+                self.itemconfig(item, state="hidden")
+                self._visible_items.discard(item)
+
+    def _hide_rectangle(self):
+        self._hide(self.rectangle, self.projected)
+        self._selected_corners = None
+        # selection changed => next mouse move has to redraw even at same position
+        self._last_motion = None
+
+    def _hide_circle_and_rectangle(self):
+        self._hide(self.circle)
+        self._hide_rectangle()
+        self._cx = self._cy = self._r = None
 
     def on_click(self, event):
+        # selection has to reflect all mouse moves before the click
+        self._flush_mouse_events()
         if self.selected_rectangle:
             self.event_generate(self.IMAGE_CROPPED_EVENT, when="now")
-        self._delete_circle_and_rectangle()
+        self._hide_circle_and_rectangle()
         self.rl = None
         self.lu = CanvasPoint(event.x, event.y)
 
     def on_right_click(self, event):
-        self._delete_circle_and_rectangle()
+        self._flush_mouse_events()
+        self._hide_circle_and_rectangle()
         self.rl = self.lu = None
 
     def on_drag(self, event):
-        self._delete_circle_and_rectangle()
-        self.rl = CanvasPoint(event.x, event.y)
-        bbox_corner1, bbox_corner2 = self.lu.circle_bounding_box_from_diameter(self.rl)
-        self.circle = self.create_oval(
-            *(*bbox_corner1, *bbox_corner2), fill="", outline="red", width=2
-        )
+        # only remember position, potentially many drags are handled in one go
+        self._drag_position = (event.x, event.y)
+        if not self._drag_job:
+            self._drag_job = self.after_idle(self._do_drag)
+
+    def _do_drag(self):
+        self._drag_job = None
+        x, y = self._drag_position
+        if not self.lu:
+            # selection was aborted while dragging
+            return
+        if self.rl and (x, y) == (self.rl.x, self.rl.y):
+            return
+        # circle stays visible while dragging, it is only moved
+        self._hide_rectangle()
+        self.rl = CanvasPoint(x, y)
+        cx = self._cx = 0.5 * (self.lu.x + self.rl.x)
+        cy = self._cy = 0.5 * (self.lu.y + self.rl.y)
+        r = self._r = 0.5 * self.lu.distance_to(self.rl)
+        self.coords(self.circle, cx - r, cy - r, cx + r, cy + r)
+        self._show(self.circle)
 
     def on_mousemove(self, event):
-        if self.rectangle:
-            self.delete(self.rectangle)
-        if self.projected:
-            self.delete(self.projected)
-        if self.lu and self.rl:
-            center = self.lu.middle_between(self.rl)
-            r = abs(center - self.lu)
-            corner1 = CanvasPoint(event.x, event.y).project_to_circle_around(center, r)
-            self.projected = self.create_oval(
-                corner1.x - 5,
-                corner1.y - 5,
-                corner1.x + 5,
-                corner1.y + 5,
-                fill="yellow",
-            )
-            corner2 = corner1.central_inversion_through(center)
-            self.selected_rectangle = Rectangle(
-                self.lu,
-                corner1,
-                self.rl,
-                corner2,
-            )
-            self.rectangle = self.create_polygon(
-                *self.selected_rectangle.flatten(),
-                fill="",
-                outline="blue",
-                width=2,
-            )
+        # only remember position, potentially many moves are handled in one go
+        self._motion_position = (event.x, event.y)
+        if not self._motion_job:
+            self._motion_job = self.after_idle(self._do_mousemove)
+
+    def _flush_mouse_events(self):
+        """Handle pending drag and mouse move before processing clicks."""
+        if self._drag_job:
+            self.after_cancel(self._drag_job)
+            self._do_drag()
+        if self._motion_job:
+            self.after_cancel(self._motion_job)
+            self._do_mousemove()
+
+    def _do_mousemove(self):
+        self._motion_job = None
+        if self._motion_position == self._last_motion:
+            return
+        x, y = self._motion_position
+        if not (self.lu and self.rl):
+            self._last_motion = x, y
+            self._hide(self.rectangle, self.projected)
+            return
+        corners = selection_corners(x, y, self._cx, self._cy, self._r)
+        if corners is None:
+            # no rectangle selected instead of leaving the one for the previous
+            # position on display
+            self._hide_rectangle()
+            return
+        self._last_motion = x, y
+        x1, y1, x2, y2 = corners
+        self._selected_corners = corners
+        self.coords(self.projected, x1 - 5, y1 - 5, x1 + 5, y1 + 5)
+        lu, rl = self.lu, self.rl
+        self.coords(self.rectangle, lu.x, lu.y, x1, y1, rl.x, rl.y, x2, y2)
+        self._show(self.projected, self.rectangle)
+
+    @property
+    def selected_rectangle(self):
+        """Currently selected rectangle or None, only built when requested
+        (instead of on every mouse move)."""
+        if self._selected_corners is None:
+            return None
+        x1, y1, x2, y2 = self._selected_corners
+        return Rectangle(self.lu, CanvasPoint(x1, y1), self.rl, CanvasPoint(x2, y2))
 
     def crop_selected_rectangle(self):
         assert self.selected_rectangle, "No rectangle has been selected"
-        canvas_width, canvas_height = self.winfo_width(), self.winfo_height()
+        # size the current preview was drawn for, i.e. the selection refers to
+        canvas_width, canvas_height = self._canvas_size
         return crop_rectangle(
             self.selected_rectangle, self.image, canvas_width, canvas_height
         )
 
 
 class AcceptCroppedImageDialog(Dialog):
-    def __init__(self, image, image_info, settings, org_image_name, *args, **kwargs):
+    def __init__(
+        self,
+        image,
+        image_info,
+        settings,
+        org_image_name,
+        *args,
+        executor=None,
+        **kwargs,
+    ):
         self.image = image
         self.image_info = image_info
         self.settings = settings
         self.org_image_name = org_image_name
+        # if given, the image is saved in the background using this executor
+        self.executor = executor
         if "title" not in kwargs:
             kwargs["title"] = "Accept cropped image?"
         super().__init__(*args, **kwargs)
@@ -348,7 +734,7 @@ class AcceptCroppedImageDialog(Dialog):
     def body(self, frame):
         w, h = 378 - 10, 265 - 10  # measured max size minus desired margin
         iw, ih = rescaled_image_size(w, h, self.image.width, self.image.height)
-        image_resized = self.image.resize((iw, ih), Image.Resampling.NEAREST)
+        image_resized = resize_for_preview(self.image, (iw, ih))
         # member variable is required for photo image to prevent garbage collection
         self._photo_image = ImageTk.PhotoImage(image_resized)
         canvas = Canvas(frame, bg="black")
@@ -364,7 +750,7 @@ class AcceptCroppedImageDialog(Dialog):
 
     def apply(self):
         """Called when dialog is accepted ("OK" is clicked or Enter is pressed).
-        Saves the image
+        Saves the image (in the background if an executor is given)
         """
         self.settings.output_directory.mkdir(parents=True, exist_ok=True)
         save_path = (
@@ -374,11 +760,23 @@ class AcceptCroppedImageDialog(Dialog):
             )
         )
         image_info = {} if self.settings.forget_metadata else self.image_info
+        if self.executor is None:
+            self._save(save_path, image_info)
+        else:
+            saved = self.executor.submit(self._save, save_path, image_info)
+            saved.add_done_callback(self._log_save_error)
+
+    def _save(self, save_path, image_info):
         self.image.save(
             save_path, format="JPEG", quality=self.settings.quality, **image_info
         )
         logging.info(f"Saved {save_path}")
 
+    @staticmethod
+    def _log_save_error(future):
+        if future.exception() is not None:
+            logging.error("Saving cropped image failed", exc_info=future.exception())
+
 
 class CropGalleryFrame(Frame):
     def __init__(self, filenames, settings, *args, **kwargs):
@@ -389,14 +787,55 @@ class CropGalleryFrame(Frame):
         self.index = 0
         self.image_info = None
         self.canvas = None
+        # background decoding of full resolution images (Pillow releases the GIL)
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._image_loaded = None
+        # futures of previews of neighbouring images, prefetched in the background;
+        # own executor such that prefetches do not wait for full resolution decoding
+        self._preview_executor = ThreadPoolExecutor(max_workers=1)
+        self._preview_cache = {}
+        self._screen_size = (self.winfo_screenwidth(), self.winfo_screenheight())
         self._setup_crop_canvas()
 
+    def _get_preview(self, index):
+        """Get image at index and its preview, prefetched if possible."""
+        future = self._preview_cache.pop(index, None)
+        if future is None or future.cancel():
+            # not prefetched or prefetch not started yet => load without waiting
+            return open_image_with_preview(self.filenames[index], self._screen_size)
+        return future.result()
+
+    def _prefetch_previews(self):
+        neighbours = [
+            index
+            for index in (self.index + 1, self.index - 1)
+            if 0 <= index < len(self.filenames)
+        ]
+        for index in list(self._preview_cache):
+            if index not in neighbours:
+                # cancels loading unless already started
+                self._preview_cache.pop(index).cancel()
+        for index in neighbours:
+            if index not in self._preview_cache:
+                self._preview_cache[index] = self._preview_executor.submit(
+                    open_image_with_preview, self.filenames[index], self._screen_size
+                )
+
     def _setup_crop_canvas(self):
-        image = Image.open(self.filenames[self.index])
+        if self._image_loaded is not None:
+            # previous image is no longer needed, cancels decoding unless started
+            self._image_loaded.cancel()
+            self._image_loaded = None
+        # preview at reduced resolution if supported, else the loaded image itself
+        image, preview_image = self._get_preview(self.index)
         self.image_info = image.info
+        if image is not preview_image:
+            # decode full resolution while the user selects, it is only needed to crop
+            self._image_loaded = self._executor.submit(image.load)
+        self._prefetch_previews()
         if self.canvas:
             self.canvas.destroy()
-        self.canvas = CropCanvas(image, self, bg="black")
+        self.canvas = CropCanvas(image, self, bg="black", preview_image=preview_image)
         self.canvas.pack(anchor="nw", fill="both", expand=1)
         self.canvas.bind(CropCanvas.IMAGE_CROPPED_EVENT, self.on_image_cropped)
         self.canvas.bind("<Left>", self.on_previous_image)
@@ -405,13 +844,28 @@ class CropGalleryFrame(Frame):
         self.canvas.bind("d", self.on_next_image)
         self.canvas.focus_set()
 
+    def destroy(self):
+        # pending decodes are not needed anymore, unlike pending saves
+        if self._image_loaded is not None:
+            self._image_loaded.cancel()
+            self._image_loaded = None
+        for future in self._preview_cache.values():
+            future.cancel()
+        self._preview_cache.clear()
+        self._executor.shutdown(wait=False)
+        self._preview_executor.shutdown(wait=False)
+        super().destroy()
+
     def on_image_cropped(self, event):
+        if self._image_loaded is not None:
+            self._image_loaded.result()
         AcceptCroppedImageDialog(
             event.widget.crop_selected_rectangle(),
             self.image_info,
             self.settings,
             self.filenames[self.index],
             event.widget,
+            executor=self._executor,
         )
 
     def on_previous_image(self, event):
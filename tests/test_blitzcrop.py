@@ -1,37 +1,86 @@
 import unittest
-from math import cos, sin, pi, degrees
+from unittest import mock
+from math import cos, sin, pi, hypot
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Event
+from time import monotonic
+from types import SimpleNamespace
+from tkinter import Tk, TclError
+
+from PIL import Image
 
 from blitzcrop import (
     parser,
     rescaled_image_size,
+    canvas_to_image,
+    resize_for_preview,
+    convert_for_display,
+    crop_rectangle,
+    project_to_circle,
+    selection_corners,
+    rotation_angle,
+    circle_bounding_box_from_diameter,
+    open_image_with_preview,
+    image_pyramid,
+    pyramid_level,
     ImagePoint,
     CanvasPoint,
+    Rectangle,
+    CropCanvas,
 )
 
 
 class TestBlitzcrop(unittest.TestCase):
+    # angles phi with (cos(phi), sin(phi)) for sweeps around the circle
+    CIRCLE_SWEEP = [
+        (phi, cos(phi), sin(phi)) for phi in (k * 0.1 * pi for k in range(20))
+    ]
+    # (canvas width, canvas height, image width, image height) => rescaled size
+    RESCALE_CASES = (
+        # square image
+        ((100, 100, 100, 100), (100, 100)),
+        ((200, 100, 100, 100), (100, 100)),
+        ((100, 50, 100, 100), (50, 50)),
+        ((200, 150, 100, 100), (150, 150)),
+        ((150, 200, 100, 100), (150, 150)),
+        # portrait image
+        ((100, 100, 100, 200), (50, 100)),
+        ((200, 300, 100, 200), (150, 300)),
+        ((300, 200, 100, 200), (100, 200)),
+        # landscape image
+        ((100, 100, 200, 100), (100, 50)),
+        ((200, 300, 200, 100), (200, 100)),
+        ((300, 200, 200, 100), (300, 150)),
+        # exact result despite floating point aspect ratio 252 / 1883
+        ((2671, 807, 252, 1883), (108, 807)),
+    )
+
     def assertPointAlmostEqual(self, point_expected, point_actual):
         self.assertAlmostEqual(point_expected[0], point_actual[0])
         self.assertAlmostEqual(point_expected[1], point_actual[1])
 
     def assertBoxAlmostEqual(self, box_expected, box_actual):
-        self.assertAlmostEqual(box_expected[0], box_actual[0][0])
-        self.assertAlmostEqual(box_expected[1], box_actual[0][1])
-        self.assertAlmostEqual(box_expected[2], box_actual[1][0])
-        self.assertAlmostEqual(box_expected[3], box_actual[1][1])
+        self.assertPointAlmostEqual(box_expected[:2], box_actual[0])
+        self.assertPointAlmostEqual(box_expected[2:], box_actual[1])
+
+    @classmethod
+    def setUpClass(cls):
+        cls.default_args = parser.parse_args([])
+        cls.version_args = parser.parse_args(["--version"])
 
     def test_argument_parsing(self):
-        args = parser.parse_args([])
-        self.assertEqual(args.version, False)
-        args = parser.parse_args(["--version"])
-        self.assertEqual(args.version, True)
+        self.assertEqual(self.default_args.version, False)
+        self.assertEqual(self.version_args.version, True)
 
     def test_point_matching_type_assertions(self):
         a = ImagePoint(1, 2)
         b = ImagePoint(3, 4)
         c = CanvasPoint(5, 6)
-        self.assertRaises(AssertionError, lambda: a + c)
-        self.assertRaises(AssertionError, lambda: a - c)
+        with self.assertRaises(AssertionError):
+            a + c
+        with self.assertRaises(AssertionError):
+            a - c
         a + b
         a - b
 
@@ -45,6 +94,7 @@ class TestBlitzcrop(unittest.TestCase):
         self.assertAlmostEqual(1, abs(ImagePoint(1, 0)))
         self.assertAlmostEqual(2**0.5, abs(ImagePoint(1, 1)))
         self.assertAlmostEqual(abs(ImagePoint(-5, 7)), abs(ImagePoint(5, -7)))
+        self.assertAlmostEqual(5, ImagePoint(1, 2).distance_to(ImagePoint(4, 6)))
 
     def test_central_inversion(self):
         a = CanvasPoint(1, 2)
@@ -60,17 +110,21 @@ class TestBlitzcrop(unittest.TestCase):
         self.assertBoxAlmostEqual((0, 0, 100, 100), bbox)
         bbox = CanvasPoint(0, 0).circle_bounding_box_from_diameter(CanvasPoint(100, 0))
         self.assertBoxAlmostEqual((0, -50, 100, 50), bbox)
-        phi = 0
-        while phi < 2 * pi:
-            x1 = 50 * (1 + cos(phi))
-            y1 = 50 * (1 + sin(phi))
-            x2 = 50 * (1 + cos(phi + pi))
-            y2 = 50 * (1 + sin(phi + pi))
-            bbox = CanvasPoint(x1, y1).circle_bounding_box_from_diameter(
-                CanvasPoint(x2, y2)
-            )
-            self.assertBoxAlmostEqual((0, 0, 100, 100), bbox)
-            phi += 0.1 * pi
+        for phi, cos_phi, sin_phi in self.CIRCLE_SWEEP:
+            with self.subTest(phi=phi):
+                x1 = 50 * (1 + cos_phi)
+                y1 = 50 * (1 + sin_phi)
+                # opposite point, using cos(phi + pi) = -cos(phi), same for sin
+                x2 = 50 * (1 - cos_phi)
+                y2 = 50 * (1 - sin_phi)
+                bbox = CanvasPoint(x1, y1).circle_bounding_box_from_diameter(
+                    CanvasPoint(x2, y2)
+                )
+                self.assertBoxAlmostEqual((0, 0, 100, 100), bbox)
+                for expected, actual in zip(
+                    (0, 0, 100, 100), circle_bounding_box_from_diameter(x1, y1, x2, y2)
+                ):
+                    self.assertAlmostEqual(expected, actual)
 
     def test_project_to_circle(self):
         p = CanvasPoint(50, 0).project_to_circle_around(CanvasPoint(0, 0), 100)
@@ -81,51 +135,267 @@ class TestBlitzcrop(unittest.TestCase):
         self.assertPointAlmostEqual((0, 100), p)
         p = CanvasPoint(0, 200).project_to_circle_around(CanvasPoint(0, 0), 100)
         self.assertPointAlmostEqual((0, 100), p)
-        phi = 0
-        while phi < 2 * pi:
-            x = 50 * (1 + cos(phi))
-            y = 50 * (1 + sin(phi))
-            p = CanvasPoint(x, y).project_to_circle_around(CanvasPoint(0, 0), 100)
-            self.assertAlmostEqual(100, (p[0] ** 2 + p[1] ** 2) ** 0.5)
-            phi += 0.1 * pi
+        for phi, cos_phi, sin_phi in self.CIRCLE_SWEEP:
+            with self.subTest(phi=phi):
+                x = 50 * (1 + cos_phi)
+                y = 50 * (1 + sin_phi)
+                p = CanvasPoint(x, y).project_to_circle_around(CanvasPoint(0, 0), 100)
+                self.assertAlmostEqual(100, hypot(p[0], p[1]))
+                self.assertPointAlmostEqual(p, project_to_circle(x, y, 0, 0, 100))
+
+    def test_selection_corners(self):
+        corners = selection_corners(50, 0, 0, 0, 100)
+        self.assertBoxAlmostEqual((100, 0, -100, 0), (corners[:2], corners[2:]))
+        corners = selection_corners(60, 20, 35, 45, 50 / 2**0.5)
+        self.assertBoxAlmostEqual((60, 20, 10, 70), (corners[:2], corners[2:]))
+        # projection of circle center is undefined
+        self.assertIsNone(selection_corners(35, 45, 35, 45, 50))
+
+    def test_containing_rectangle(self):
+        rect = Rectangle(
+            CanvasPoint(50, 0),
+            CanvasPoint(100, 50),
+            CanvasPoint(50, 100),
+            CanvasPoint(0, 50),
+        ).containing_rectangle()
+        self.assertEqual(CanvasPoint(0, 0), rect.left_upper)
+        self.assertEqual(CanvasPoint(100, 0), rect.right_upper)
+        self.assertEqual(CanvasPoint(100, 100), rect.right_lower)
+        self.assertEqual(CanvasPoint(0, 100), rect.left_lower)
+        self.assertEqual((0, 0, 100, 0, 100, 100, 0, 100), rect.flatten())
+
+    def test_crop_rectangle(self):
+        image = Image.new("L", (100, 100))
+        image.putdata([(7 * i + 13 * (i // 100)) % 256 for i in range(100 * 100)])
+        expected = image.crop((10, 20, 60, 70))
+        rect = Rectangle(
+            CanvasPoint(10, 20),
+            CanvasPoint(60, 20),
+            CanvasPoint(60, 70),
+            CanvasPoint(10, 70),
+        )
+        cropped = crop_rectangle(rect, image, 100, 100)
+        self.assertEqual(expected.tobytes(), cropped.tobytes())
+        # canvas is half the size of the image
+        rect = Rectangle(
+            CanvasPoint(5, 10),
+            CanvasPoint(30, 10),
+            CanvasPoint(30, 35),
+            CanvasPoint(5, 35),
+        )
+        cropped = crop_rectangle(rect, image, 50, 50)
+        self.assertEqual(expected.tobytes(), cropped.tobytes())
+        # rotated by less than half a pixel
+        rect = Rectangle(
+            CanvasPoint(10, 20),
+            CanvasPoint(60, 20.2),
+            CanvasPoint(59.8, 70),
+            CanvasPoint(10, 70),
+        )
+        cropped = crop_rectangle(rect, image, 100, 100)
+        self.assertEqual(expected.tobytes(), cropped.tobytes())
+        # rotated by 90 degrees
+        rect = Rectangle(
+            CanvasPoint(60, 20),
+            CanvasPoint(60, 70),
+            CanvasPoint(10, 70),
+            CanvasPoint(10, 20),
+        )
+        cropped = crop_rectangle(rect, image, 100, 100)
+        self.assertEqual(
+            expected.transpose(Image.Transpose.ROTATE_90).tobytes(), cropped.tobytes()
+        )
+        # dragged from lower right corner => not rotated by 180 degrees
+        rect = Rectangle(
+            CanvasPoint(60, 70),
+            CanvasPoint(10, 70),
+            CanvasPoint(10, 20),
+            CanvasPoint(60, 20),
+        )
+        cropped = crop_rectangle(rect, image, 100, 100)
+        self.assertEqual(expected.tobytes(), cropped.tobytes())
+        # rotated by 270 degrees
+        rect = Rectangle(
+            CanvasPoint(10, 70),
+            CanvasPoint(10, 20),
+            CanvasPoint(60, 20),
+            CanvasPoint(60, 70),
+        )
+        cropped = crop_rectangle(rect, image, 100, 100)
+        self.assertEqual(
+            expected.transpose(Image.Transpose.ROTATE_270).tobytes(), cropped.tobytes()
+        )
+        # corners counterclockwise => rotated by 90 degrees, not mirrored
+        rect = Rectangle(
+            CanvasPoint(10, 20),
+            CanvasPoint(10, 70),
+            CanvasPoint(60, 70),
+            CanvasPoint(60, 20),
+        )
+        cropped = crop_rectangle(rect, image, 100, 100)
+        self.assertEqual(
+            expected.transpose(Image.Transpose.ROTATE_90).tobytes(), cropped.tobytes()
+        )
+        # rotated rectangle dragged from upper left or lower right corner
+        rect = Rectangle(
+            CanvasPoint(20, 10),
+            CanvasPoint(70, 30),
+            CanvasPoint(50, 80),
+            CanvasPoint(0, 60),
+        )
+        cropped = crop_rectangle(rect, image, 100, 100)
+        self.assertEqual((54, 54), cropped.size)
+        rect = Rectangle(
+            CanvasPoint(50, 80),
+            CanvasPoint(0, 60),
+            CanvasPoint(20, 10),
+            CanvasPoint(70, 30),
+        )
+        self.assertEqual(
+            cropped.tobytes(), crop_rectangle(rect, image, 100, 100).tobytes()
+        )
 
     def test_rescaled_image_size(self):
-        # square image
-        s = rescaled_image_size(100, 100, 100, 100)
-        self.assertPointAlmostEqual((100, 100), s)
-        s = rescaled_image_size(200, 100, 100, 100)
-        self.assertPointAlmostEqual((100, 100), s)
-        s = rescaled_image_size(100, 50, 100, 100)
-        self.assertPointAlmostEqual((50, 50), s)
-        s = rescaled_image_size(200, 150, 100, 100)
-        self.assertPointAlmostEqual((150, 150), s)
-        s = rescaled_image_size(150, 200, 100, 100)
-        self.assertPointAlmostEqual((150, 150), s)
-        # portrait image
-        s = rescaled_image_size(100, 100, 100, 200)
-        self.assertPointAlmostEqual((50, 100), s)
-        s = rescaled_image_size(200, 300, 100, 200)
-        self.assertPointAlmostEqual((150, 300), s)
-        s = rescaled_image_size(300, 200, 100, 200)
-        self.assertPointAlmostEqual((100, 200), s)
-        # landscape image
-        s = rescaled_image_size(100, 100, 200, 100)
-        self.assertPointAlmostEqual((100, 50), s)
-        s = rescaled_image_size(200, 300, 200, 100)
-        self.assertPointAlmostEqual((200, 100), s)
-        s = rescaled_image_size(300, 200, 200, 100)
-        self.assertPointAlmostEqual((300, 150), s)
+        for args, expected in self.RESCALE_CASES:
+            with self.subTest(args=args):
+                self.assertEqual(expected, rescaled_image_size(*args))
+
+    def test_resize_for_preview(self):
+        image = Image.new("RGB", (400, 300))
+        self.assertEqual((400, 300), resize_for_preview(image, (400, 300)).size)
+        self.assertEqual((300, 225), resize_for_preview(image, (300, 225)).size)
+        self.assertEqual((40, 30), resize_for_preview(image, (40, 30)).size)
+
+    def test_convert_for_display(self):
+        image = Image.new("RGB", (4, 3))
+        self.assertIs(image, convert_for_display(image))
+        self.assertEqual("RGB", convert_for_display(Image.new("CMYK", (4, 3))).mode)
+        self.assertEqual("RGB", convert_for_display(Image.new("P", (4, 3))).mode)
+        self.assertEqual("RGBA", convert_for_display(Image.new("LA", (4, 3))).mode)
+
+    def test_open_image_with_preview(self):
+        with TemporaryDirectory() as tmp_dir:
+            jpeg_path, png_path = Path(tmp_dir) / "test.jpg", Path(tmp_dir) / "test.png"
+            Image.new("RGB", (2000, 1500)).save(jpeg_path)
+            Image.new("RGB", (2000, 1500)).save(png_path)
+            # JPEG is decoded at reduced scale for the preview
+            image, preview_image = open_image_with_preview(jpeg_path, (400, 300))
+            self.assertEqual((2000, 1500), image.size)
+            self.assertEqual((500, 375), preview_image.size)
+            # other formats are only opened and decoded once, at full resolution
+            with mock.patch("blitzcrop.Image.open", wraps=Image.open) as image_open:
+                image, preview_image = open_image_with_preview(png_path, (400, 300))
+            self.assertEqual(1, image_open.call_count)
+            self.assertIs(image, preview_image)
+            self.assertEqual((2000, 1500), image.size)
+            # same for JPEG if it is not larger than the preview size
+            image, preview_image = open_image_with_preview(jpeg_path, (4000, 3000))
+            self.assertIs(image, preview_image)
+
+    def test_image_pyramid(self):
+        image = Image.new("RGB", (4000, 3000))
+        pyramid = image_pyramid(image)
+        self.assertIs(image, pyramid[0])
+        self.assertEqual(
+            [(4000, 3000), (2000, 1500), (1000, 750), (500, 375)],
+            [level.size for level in pyramid],
+        )
+        small_image = Image.new("RGB", (600, 400))
+        self.assertEqual([small_image], image_pyramid(small_image))
+        self.assertEqual((500, 375), pyramid_level(pyramid, (400, 300)).size)
+        self.assertEqual((1000, 750), pyramid_level(pyramid, (600, 450)).size)
+        self.assertEqual((1000, 750), pyramid_level(pyramid, (1000, 750)).size)
+        self.assertIs(image, pyramid_level(pyramid, (8000, 6000)))
+
+    def test_canvas_to_image(self):
+        self.assertPointAlmostEqual((0, 0), canvas_to_image(0, 50, 100, 200, 50, 50))
+        self.assertPointAlmostEqual(
+            (50, 50), canvas_to_image(100, 150, 100, 200, 50, 50)
+        )
+        self.assertPointAlmostEqual(
+            (25, 10), CanvasPoint(50, 70).to_image_coordinates(100, 200, 50, 50)
+        )
 
     def test_rotation_angle(self):
         angle = CanvasPoint(0, 0).rotation_angle(CanvasPoint(1, 0))
         self.assertAlmostEqual(0, angle)
         angle = CanvasPoint(100, 100).rotation_angle(CanvasPoint(200, 100))
         self.assertAlmostEqual(0, angle)
-        angle = degrees(CanvasPoint(100, 100).rotation_angle(CanvasPoint(200, 200)))
-        self.assertAlmostEqual(-45, angle)
-        angle = degrees(CanvasPoint(100, 100).rotation_angle(CanvasPoint(200, 0)))
-        self.assertAlmostEqual(45, angle)
-        angle = degrees(CanvasPoint(100, 100).rotation_angle(CanvasPoint(100, 200)))
-        self.assertAlmostEqual(-90, angle)
-        angle = degrees(CanvasPoint(100, 100).rotation_angle(CanvasPoint(100, 0)))
-        self.assertAlmostEqual(90, angle)
+        angle = CanvasPoint(100, 100).rotation_angle(CanvasPoint(200, 200))
+        self.assertAlmostEqual(-pi / 4, angle)
+        angle = CanvasPoint(100, 100).rotation_angle(CanvasPoint(200, 0))
+        self.assertAlmostEqual(pi / 4, angle)
+        angle = CanvasPoint(100, 100).rotation_angle(CanvasPoint(100, 200))
+        self.assertAlmostEqual(-pi / 2, angle)
+        angle = CanvasPoint(100, 100).rotation_angle(CanvasPoint(100, 0))
+        self.assertAlmostEqual(pi / 2, angle)
+        angle = CanvasPoint(100, 100).rotation_angle(CanvasPoint(0, 0))
+        self.assertAlmostEqual(3 * pi / 4, angle)
+        angle = CanvasPoint(100, 100).rotation_angle(CanvasPoint(0, 200))
+        self.assertAlmostEqual(-3 * pi / 4, angle)
+        self.assertAlmostEqual(-3 * pi / 4, rotation_angle(100, 100, 0, 200))
+
+
+class TestCropCanvas(unittest.TestCase):
+    def setUp(self):
+        try:
+            self.root = Tk()
+        except TclError:
+            self.skipTest("Tk display not available")
+        self.addCleanup(self.root.destroy)
+        self.image = Image.new("L", (400, 300))
+        self.image.putdata([(7 * i + 13 * (i // 400)) % 256 for i in range(400 * 300)])
+        self.canvas = CropCanvas(self.image, self.root)
+        self.canvas.redraw_image(400, 300)
+
+    def select(self, *points):
+        """Select rectangle by click, drag and mouse move to the given points."""
+        (x1, y1), (x2, y2), (x3, y3) = points
+        self.canvas.on_click(SimpleNamespace(x=x1, y=y1))
+        self.canvas.on_drag(SimpleNamespace(x=x2, y=y2))
+        self.canvas.on_mousemove(SimpleNamespace(x=x3, y=y3))
+        self.canvas._flush_mouse_events()
+
+    def test_crop_during_background_resize(self):
+        # block background worker such that the resize is not committed yet
+        blocked = Event()
+        self.addCleanup(blocked.set)
+        self.canvas._executor.submit(blocked.wait)
+        self.canvas.redraw_image(200, 150)
+        # selection refers to image displayed for previous canvas size
+        self.select((10, 20), (60, 70), (60, 20))
+        self.assertEqual(
+            self.image.crop((10, 20, 60, 70)).tobytes(),
+            self.canvas.crop_selected_rectangle().tobytes(),
+        )
+        blocked.set()
+        deadline = monotonic() + 5
+        while self.canvas._pending_size and monotonic() < deadline:
+            self.root.update()
+        self.assertIsNone(self.canvas._pending_size)
+        # after resize, canvas shows image at half size
+        self.assertEqual(
+            self.image.crop((20, 40, 120, 140)).tobytes(),
+            self.canvas.crop_selected_rectangle().tobytes(),
+        )
+
+    def test_superseded_resize_is_cancelled(self):
+        blocked = Event()
+        self.addCleanup(blocked.set)
+        self.canvas._executor.submit(blocked.wait)
+        self.canvas.redraw_image(200, 150)
+        superseded = self.canvas._pending_future
+        self.canvas.redraw_image(100, 75)
+        self.assertTrue(superseded.cancelled())
+        self.assertFalse(self.canvas._pending_future.cancelled())
+
+    def test_no_selection_at_circle_center(self):
+        self.select((10, 20), (60, 70), (60, 20))
+        self.assertIsNotNone(self.canvas.selected_rectangle)
+        # projection of circle center is undefined
+        self.canvas.on_mousemove(SimpleNamespace(x=35, y=45))
+        self.canvas._flush_mouse_events()
+        self.assertIsNone(self.canvas.selected_rectangle)
+        self.canvas.on_mousemove(SimpleNamespace(x=60, y=20))
+        self.canvas._flush_mouse_events()
+        self.assertIsNotNone(self.canvas.selected_rectangle)